@@ -29,24 +29,44 @@ Example:
     cache.set('c', 3)
     cache.set('d', 4)
     cache  # {'b': 2, 'c': 3, 'd': 4}
+
+    # Many concurrent writers
+    cache = simplecache.ShardedCache(ttl=60, shards=16)
 """
+import heapq
+import itertools
 import time
 import threading
+import weakref
+from collections import OrderedDict, deque
 
 
 _DEFAULT = object()  # differentiate between kwargs being passed explicitly as None
+_INF = float('inf')  # expiry of keys that never expire
+_sequence = itertools.count()  # breaks expiry ties so index nodes never compare keys
+
+_MIN_INTERVAL = .01  # shortest gap between background runs for a cache
 
 
 class Cache:
     """In-memory cache supporting a TTL and max size."""
 
-    def __init__(self, ttl=None, maxsize=None):
+    __slots__ = ('ttl', 'maxsize', 'storage', 'lock', 'index', '_needs_prune', '_now',
+                 '__weakref__')
+
+    def __init__(self, ttl=None, maxsize=None, clock_resolution=None):
         """
         Args:
             ttl (float, optional): Time to keep values cached (in seconds). If
-                None, values will be cached indefinitely.
+                None, values will be cached indefinitely. Expired values are
+                reclaimed by a background thread shared by all caches.
             maxsize (int, optional): Max number of entries to allow into cache.
-                If None, cache can grow indefinitely.
+                If None, cache can grow indefinitely. Least recently used
+                entries are evicted first.
+            clock_resolution (float, optional): If set, read the time from a
+                clock refreshed in the background every `clock_resolution`
+                seconds (at least 10ms) instead of calling `time.monotonic()`
+                per operation. One thread refreshes the clocks of all caches.
         """
         if ttl and ttl < 0:
             raise ValueError("ttl must be greater than 0")
@@ -54,13 +74,29 @@ class Cache:
         if maxsize and maxsize < 0:
             raise ValueError("maxsize must be greater than 0")
 
-        self.ttl = ttl or float('inf')
-        self.maxsize = maxsize
-        self.storage = {}  # {key: (value, timestamp)}
+        if clock_resolution is not None and clock_resolution <= 0:
+            raise ValueError("clock_resolution must be greater than 0")
+
+        self.ttl = ttl or _INF
+        self.maxsize = maxsize or None  # 0 means unbounded, as None does
+        # {key: (value, expires)} in LRU order. Entries are immutable tuples so
+        # lock-free readers never see one half-updated or reused for another key.
+        self.storage = OrderedDict()
         self.lock = threading.Lock()
 
-        # poor man's heap
-        self.index = []  # (expires, key) pairs in desc order (popping is cheaper)
+        # (expires, seq, key) nodes for expiring keys only, stalest first. A
+        # deque while keys arrive in expiry order (a fixed ttl), else a min-heap.
+        self.index = deque()
+        self._needs_prune = self.ttl != _INF  # False until a key can expire
+
+        self._now = None  # coarse clock reading, if enabled
+        if clock_resolution is not None:
+            self._now = time.monotonic()
+            _clock.add(self, clock_resolution)
+
+        # reclaim expired entries off the read path
+        if self._needs_prune:
+            _reaper.add(self, min(self.ttl, 1.0))
 
     def set(self, key, value, ttl=_DEFAULT):
         """Add a value to the cache.
@@ -71,22 +107,95 @@ class Cache:
             ttl (float, optional): Seconds to cache the value.
         """
         ttl = self.ttl if ttl is _DEFAULT else ttl
-        ttl = float('inf') if ttl is None else ttl  # if None is passed as kwarg
-        now = time.monotonic()
-        expires = now + ttl
+        ttl = _INF if ttl is None else ttl  # if None is passed as kwarg
+        if ttl == _INF:
+            expires = ttl  # no need to read the clock
+        else:
+            expires = self._monotonic() + ttl
 
         with self.lock:
-            # prevent duplicates in heap
-            if key in self.storage:
-                i = [node[1] for node in self.index].index(key)  # not great for large lists
-                del self.index[i]
-                del self.storage[key]
+            storage = self.storage
+            storage[key] = (value, expires)
+            storage.move_to_end(key)  # overwrites count as the newest write
+
+            maxsize = self.maxsize
+            if maxsize is not None:
+                while len(storage) > maxsize:
+                    storage.popitem(last=False)
+
+            # overwritten or evicted keys leave a stale node in the heap; prune skips it
+            if expires != _INF:
+                node = (expires, next(_sequence), key)
+                index = self.index
+                if isinstance(index, deque):
+                    if index and expires < index[-1][0]:
+                        # out of order per-key ttl, fall back to a heap (the
+                        # deque is sorted, so it is already a valid heap)
+                        index = self.index = list(index)
+                        heapq.heappush(index, node)
+                    else:
+                        index.append(node)
+                else:
+                    heapq.heappush(index, node)
+                if not self._needs_prune:  # first expiring key
+                    self._needs_prune = True
+                    _reaper.add(self, min(ttl, 1.0))
+
+            self._compact()
+
+        if self._needs_prune:
+            self.prune()
+
+    def set_many(self, items, ttl=_DEFAULT):
+        """Add several values to the cache at once.
+
+        Cheaper than calling `set` per item: the lock is taken and the clock is
+        read once, and the index is extended in a single step.
 
-            self.storage[key] = (value, expires)
-            self.index.append((expires, key))
-            self.index.sort(reverse=True)  # put staler keys towards back
+        Args:
+            items (dict or iterable): Mapping or (key, value) pairs to cache.
+            ttl (float, optional): Seconds to cache the values.
+        """
+        items = dict(items)
+        ttl = self.ttl if ttl is _DEFAULT else ttl
+        ttl = _INF if ttl is None else ttl  # if None is passed as kwarg
+        if ttl == _INF:
+            expires = ttl  # no need to read the clock
+        else:
+            expires = self._monotonic() + ttl
 
-        self.prune()
+        with self.lock:
+            storage = self.storage
+            for key, value in items.items():
+                storage[key] = (value, expires)
+                storage.move_to_end(key)  # overwrites count as the newest write
+
+            maxsize = self.maxsize
+            if maxsize is not None:
+                while len(storage) > maxsize:
+                    storage.popitem(last=False)
+
+            if expires != _INF and items:
+                nodes = [(expires, next(_sequence), key) for key in items]
+                index = self.index
+                if isinstance(index, deque):
+                    if index and expires < index[-1][0]:
+                        # out of order per-key ttl, fall back to a heap (the
+                        # deque is sorted, so it is already a valid heap)
+                        index = self.index = list(index)
+                    else:
+                        index.extend(nodes)
+                        nodes = ()
+                for node in nodes:
+                    heapq.heappush(index, node)
+                if not self._needs_prune:  # first expiring keys
+                    self._needs_prune = True
+                    _reaper.add(self, min(ttl, 1.0))
+
+            self._compact()
+
+        if self._needs_prune:
+            self.prune()
 
     def get(self, key, default=_DEFAULT):
         """Retrieve a value from the cache.
@@ -99,16 +208,26 @@ class Cache:
         Returns:
             any: The cached value for the given key.
         """
-        self.prune()
-
-        try:
-            value, expires = self.storage[key]
-        except KeyError:
+        # Lock-free: a single lookup snapshots the entry, which is only trusted
+        # after checking its own expiry. Expired entries are left for the next
+        # prune to reclaim. Without a ttl or maxsize this reduces to a dict
+        # lookup and two attribute checks. Only the LRU reorder takes the lock,
+        # since it would break writers iterating storage.
+        storage = self.storage
+        entry = storage.get(key)
+        if entry is None or (self._needs_prune and self._monotonic() > entry[1]):
             if default is _DEFAULT:
-                raise
+                raise KeyError(key)
             return default
 
-        return value
+        if self.maxsize is not None:
+            with self.lock:
+                try:
+                    storage.move_to_end(key)
+                except KeyError:  # pragma: no cover
+                    pass  # evicted since the lookup; the snapshot is still valid
+
+        return entry[0]
 
     def exists(self, key):
         """Return whether the given key exists.
@@ -119,43 +238,212 @@ class Cache:
         Returns:
             bool: Whether the key is in the cache.
         """
-        self.prune()
-        return key in self.storage
+        entry = self.storage.get(key)
+        if entry is None:
+            return False
+        return not (self._needs_prune and self._monotonic() > entry[1])
+
+    def _compact(self):
+        """Rebuild the index once stale nodes outnumber live ones."""
+        storage = self.storage
+        if len(self.index) > 2 * len(storage):
+            live = sorted((e, next(_sequence), k) for k, (v, e) in storage.items()
+                          if e != _INF)  # sorted is also a valid heap
+            self.index = deque(live) if isinstance(self.index, deque) else live
+
+    def _monotonic(self):
+        return time.monotonic() if self._now is None else self._now
 
     def prune(self):
         """Remove stale items from the cache."""
-        now = time.monotonic()
-        while self.index:
-            expires, key = self.index[-1]
-            expired = now > expires
-            maxsize = self.maxsize or float('inf')
-            oversized = len(self.storage) > maxsize
-            if expired or oversized:
-                with self.lock:
-                    del self.storage[key]
-                    self.index.pop()
-            else:
-                break
+        now = self._monotonic()
+        with self.lock:
+            storage = self.storage
+            index = self.index
+            fifo = isinstance(index, deque)
+            while index:
+                expires, _, key = index[0]
+                entry = storage.get(key)
+                stale = entry is None or entry[1] != expires
+                expired = now > expires
+                if stale or expired:
+                    if not stale:
+                        del storage[key]
+                    if fifo:
+                        index.popleft()
+                    else:
+                        heapq.heappop(index)
+                else:
+                    break
 
     def clear(self):
         """Empty the cache."""
         with self.lock:
-            self.storage = {}
-            self.index = []
+            self.storage = OrderedDict()
+            self.index = deque()
 
     def __iter__(self):
-        self.prune()
-        for _, key in self.index:
-            value, expires = self.storage[key]
-            yield key, value
+        now = self._monotonic() if self._needs_prune else -_INF
+        storage = self.storage
+        for key, (value, expires) in list(storage.items()):
+            if now <= expires:
+                yield key, value
 
     def __repr__(self):
-        if len(self.storage) <= 3:
-            return str({k: v[0] for k, v in self.storage.items()})
+        with self.lock:  # writers reorder storage
+            storage = self.storage
+            if len(storage) <= 3:
+                return _format(storage.items())
 
-        else:
-            sample = {}
-            for i in range(3):
-                k = self.index[i][1]  # (timestamp, key)
-                sample[k] = self.storage[k][0]
-            return str(sample).rstrip('}') + ', ...}'
+            else:
+                # most recently written first (or read, if maxsize is set)
+                sample = itertools.islice(reversed(storage.items()), 3)
+                return _format(sample, truncated=True)
+
+
+class ShardedCache:
+    """Cache split into independently locked shards to reduce writer contention.
+
+    Keys are assigned to a shard by hash, so writers on different shards never
+    wait on each other. `maxsize` is divided evenly between shards, making LRU
+    eviction approximate.
+    """
+
+    __slots__ = ('_mask', '_shards')
+
+    def __init__(self, ttl=None, maxsize=None, shards=16, clock_resolution=None):
+        """
+        Args:
+            ttl (float, optional): Time to keep values cached (in seconds). If
+                None, values will be cached indefinitely.
+            maxsize (int, optional): Max number of entries to allow into cache.
+                If None, cache can grow indefinitely. Each shard holds at most
+                `maxsize // shards` entries, so it must be at least `shards`.
+            shards (int, optional): Number of shards. Must be a power of 2.
+            clock_resolution (float, optional): See `Cache`.
+        """
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("shards must be a power of 2")
+
+        if maxsize and maxsize < 0:
+            raise ValueError("maxsize must be greater than 0")
+
+        if maxsize and maxsize < shards:
+            raise ValueError("maxsize must be at least the number of shards")
+
+        if maxsize:
+            maxsize = maxsize // shards  # round down to stay within maxsize
+
+        self._mask = shards - 1
+        self._shards = [Cache(ttl=ttl, maxsize=maxsize, clock_resolution=clock_resolution)
+                        for _ in range(shards)]
+
+    def _shard(self, key):
+        return self._shards[hash(key) & self._mask]
+
+    def set(self, key, value, ttl=_DEFAULT):
+        """Add a value to the cache. See `Cache.set`."""
+        self._shard(key).set(key, value, ttl)
+
+    def set_many(self, items, ttl=_DEFAULT):
+        """Add several values to the cache at once. See `Cache.set_many`."""
+        batches = [{} for _ in self._shards]
+        for key, value in dict(items).items():
+            batches[hash(key) & self._mask][key] = value
+        for shard, batch in zip(self._shards, batches):
+            if batch:
+                shard.set_many(batch, ttl)
+
+    def get(self, key, default=_DEFAULT):
+        """Retrieve a value from the cache. See `Cache.get`."""
+        return self._shard(key).get(key, default)
+
+    def exists(self, key):
+        """Return whether the given key exists. See `Cache.exists`."""
+        return self._shard(key).exists(key)
+
+    def prune(self):
+        """Remove stale items from every shard."""
+        for shard in self._shards:
+            shard.prune()
+
+    def clear(self):
+        """Empty the cache."""
+        for shard in self._shards:
+            shard.clear()
+
+    def __len__(self):
+        return sum(len(shard.storage) for shard in self._shards)
+
+    def __iter__(self):
+        for shard in self._shards:
+            yield from shard
+
+    def __repr__(self):
+        sample = []
+        for shard in self._shards:
+            with shard.lock:  # writers reorder storage
+                sample.extend(itertools.islice(shard.storage.items(), 4 - len(sample)))
+            if len(sample) > 3:
+                break
+        return _format(sample[:3], truncated=len(sample) > 3)
+
+
+def _format(entries, truncated=False):
+    """Format (key, (value, expires)) pairs like a dict."""
+    body = ', '.join(f'{k!r}: {v!r}' for k, (v, expires) in entries)
+    return '{' + body + (', ...}' if truncated else '}')
+
+
+class _Periodic:
+    """Call `func(cache)` for registered caches from one shared daemon thread.
+
+    Each cache is called on its own interval (at least `_MIN_INTERVAL`), so a
+    short interval on one cache doesn't make the others run more often. Caches
+    are held weakly and the thread exits once none are left.
+    """
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self.schedule = weakref.WeakKeyDictionary()  # {cache: (interval, due)}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()  # set on registration, so its interval is seen
+        self.thread = None
+
+    def add(self, cache, interval):
+        """Call `func(cache)` every `interval` seconds until `cache` is collected."""
+        with self.lock:
+            self.schedule[cache] = (max(interval, _MIN_INTERVAL), time.monotonic())
+            self.wake.set()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name=self.name,
+                                               daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wake.clear()
+            with self.lock:
+                if not self.schedule:
+                    self.thread = None
+                    return
+
+                now = time.monotonic()
+                due = [(c, i) for c, (i, d) in self.schedule.items() if d <= now]
+                for cache, interval in due:
+                    self.schedule[cache] = (interval, now + interval)
+                wait = min(d for i, d in self.schedule.values()) - now
+
+            for cache, interval in due:
+                self.func(cache)
+            due = cache = None  # don't keep the caches alive while sleeping
+            self.wake.wait(wait)
+
+
+def _refresh_clock(cache):
+    cache._now = time.monotonic()
+
+
+_reaper = _Periodic('simplecache-reaper', Cache.prune)
+_clock = _Periodic('simplecache-clock', _refresh_clock)
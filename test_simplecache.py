@@ -1,3 +1,6 @@
+import collections
+import sys
+import threading
 import time
 
 import simplecache
@@ -33,6 +36,12 @@ class TestBasics:
         with pytest.raises(KeyError, match=r"pin"):
             cache.get('pin')
 
+    def test_set_many(self):
+        cache = simplecache.Cache()
+        cache.set_many({'captain': 'leela', 'delivery-boy': 'fry'})
+        cache.set_many([('cook', 'bender')])
+        assert dict(cache) == {'captain': 'leela', 'delivery-boy': 'fry', 'cook': 'bender'}
+
     def test_exists(self):
         cache = simplecache.Cache()
         cache.set('pin', 1077)
@@ -54,6 +63,29 @@ class TestBasics:
         d = dict(cache)
         assert d == {'captain': 'leela', 'delivery-boy': 'fry', 'cook': 'bender'}
 
+    def test_repr(self):
+        cache = simplecache.Cache(ttl=60)
+        cache.set('a', 1)
+        assert repr(cache) == "{'a': 1}"
+
+        cache.set('b', 2)
+        cache.set('c', 3)
+        cache.set('d', 4)
+        assert repr(cache) == "{'d': 4, 'c': 3, 'b': 2, ...}"
+
+        cache.set('a', 9)
+        assert repr(cache) == "{'a': 9, 'd': 4, 'c': 3, ...}"
+
+    def test_repr_lru(self):
+        cache = simplecache.Cache(maxsize=10)
+        for v, k in enumerate('abcd', 1):
+            cache.set(k, v)
+        cache.set('a', 9)  # most recently used
+        assert repr(cache) == "{'a': 9, 'd': 4, 'c': 3, ...}"
+
+        cache.get('b')
+        assert repr(cache) == "{'b': 2, 'a': 9, 'd': 4, ...}"
+
 
 class TestConstructor:
     """Test constructor args."""
@@ -61,10 +93,19 @@ class TestConstructor:
         with pytest.raises(ValueError, match=r"ttl must be greater than 0"):
             simplecache.Cache(ttl=-1)
 
+    def test_slots(self):
+        cache = simplecache.Cache()
+        with pytest.raises(AttributeError):
+            cache.__dict__
+
     def test_bad_maxsize(self):
         with pytest.raises(ValueError, match=r"maxsize must be greater than 0"):
             simplecache.Cache(maxsize=-1)
 
+    def test_bad_clock_resolution(self):
+        with pytest.raises(ValueError, match=r"clock_resolution must be greater than 0"):
+            simplecache.Cache(clock_resolution=0)
+
 
 class TestExpiration:
     """Test expiration works correctly."""
@@ -78,6 +119,7 @@ class TestExpiration:
             cache.get('pin')
 
         # make sure storage objects get cleared
+        cache.prune()
         assert not cache.storage
         assert not cache.index
 
@@ -100,6 +142,120 @@ class TestExpiration:
         v = cache.get('pin')
         assert v == 1077
 
+    def test_exists_and_iter(self):
+        cache = simplecache.Cache()  # no default ttl, so no background pruning
+        cache.set('pin', 1077, ttl=.1)
+        cache.set('captain', 'leela', ttl=60)
+        time.sleep(.1)
+        assert not cache.exists('pin')
+        assert dict(cache) == {'captain': 'leela'}
+
+    def test_expired_before_prune(self):
+        cache = simplecache.Cache()  # no default ttl, so no background pruning
+        cache.set('pin', 1077, ttl=.1)
+        time.sleep(.1)
+        assert 'pin' in cache.storage  # nothing has pruned it yet
+        assert not cache.exists('pin')
+        assert cache.get('pin', None) is None
+
+    def test_fixed_ttl_index(self):
+        cache = simplecache.Cache(ttl=60)
+        cache.set('captain', 'leela')
+        cache.set('delivery-boy', 'fry', ttl=120)
+        assert isinstance(cache.index, collections.deque)
+
+        cache.set('pin', 1077, ttl=.1)  # expires before the others
+        assert isinstance(cache.index, list)
+        time.sleep(.1)
+        assert not cache.exists('pin')
+        assert cache.get('captain') == 'leela'
+
+        cache.prune()
+        assert 'pin' not in cache.storage
+
+    def test_background_prune(self):
+        cache = simplecache.Cache(ttl=.1)
+        cache.set('pin', 1077)
+        time.sleep(.3)
+        assert not cache.storage
+        assert not cache.index
+
+    def test_set_many_ttl(self):
+        cache = simplecache.Cache(ttl=60)
+        cache.set_many({'captain': 'leela', 'delivery-boy': 'fry'})
+        assert isinstance(cache.index, collections.deque)
+
+        cache.set_many({'pin': 1077, 'balance': 0.93}, ttl=.1)  # out of order
+        assert isinstance(cache.index, list)
+        heap = cache.index
+        cache.set_many({'cook': 'bender'}, ttl=.1)
+        assert cache.index is heap  # pushed in place
+        time.sleep(.1)
+        assert not cache.exists('pin')
+        assert not cache.exists('cook')
+        assert cache.get('captain') == 'leela'
+
+    def test_background_prune_shared(self):
+        caches = [simplecache.Cache(ttl=60) for _ in range(50)]
+        caches.append(simplecache.ShardedCache(ttl=60))
+        reapers = [t for t in threading.enumerate() if t.name == 'simplecache-reaper']
+        assert len(reapers) == 1
+
+    def test_background_prune_schedule(self):
+        cache = simplecache.Cache(ttl=3600)
+        tiny = simplecache.Cache(ttl=1e-6)
+        prunes = []
+        original = simplecache._reaper.func
+        simplecache._reaper.func = lambda c: prunes.append(c) or original(c)
+        try:
+            time.sleep(.2)
+        finally:
+            simplecache._reaper.func = original
+
+        assert prunes.count(cache) <= 1  # not pruned at the short ttl's rate
+        assert prunes.count(tiny) <= 21  # interval has a floor
+
+    def test_background_prune_per_key_ttl(self):
+        cache = simplecache.Cache()  # no default ttl
+        cache.set('pin', 1077, ttl=.1)
+        bulk = simplecache.Cache()
+        bulk.set_many({'captain': 'leela'}, ttl=.1)
+        time.sleep(.3)
+        assert not cache.storage
+        assert not bulk.storage
+
+    def test_clock_resolution(self):
+        cache = simplecache.Cache(ttl=.1, clock_resolution=.01)
+        cache.set('pin', 1077)
+        assert cache.get('pin') == 1077
+        time.sleep(.2)
+        with pytest.raises(KeyError, match=r"pin"):
+            cache.get('pin')
+
+    def test_clock_shared(self):
+        caches = [simplecache.Cache(clock_resolution=.01) for _ in range(50)]
+        caches.append(simplecache.ShardedCache(clock_resolution=.01))
+        tickers = [t for t in threading.enumerate() if t.name == 'simplecache-clock']
+        assert len(tickers) == 1
+
+    def test_clock_stops_with_cache(self):
+        cache = simplecache.Cache(clock_resolution=.01)
+        ticker = simplecache._clock.thread
+        assert ticker.daemon
+
+        del cache
+        ticker.join(timeout=1)
+        assert not ticker.is_alive()
+
+    def test_clock_unorderable_keys(self):
+        cache = simplecache.Cache(ttl=60, clock_resolution=1)
+        cache.set('captain', 'leela')  # keeps stale nodes from reaching the top
+        for i in range(10):  # same coarse expiry for every set
+            cache.set(1, i)
+            cache.set('a', i)
+        assert len(cache.index) <= 2 * len(cache.storage)
+        assert cache.get('a') == 9
+
     def test_sorting(self):
         cache = simplecache.Cache(ttl=1)
         cache.set('captain', 'leela')
@@ -130,6 +286,90 @@ class TestMaxSize:
 
         assert cache.get('cook') == 'bender'
 
+    def test_zero_is_unbounded(self):
+        cache = simplecache.Cache(maxsize=0)
+        cache.set('captain', 'leela')
+        cache.set('delivery-boy', 'fry')
+        assert dict(cache) == {'captain': 'leela', 'delivery-boy': 'fry'}
+
+    def test_lru(self):
+        cache = simplecache.Cache(maxsize=2)
+        cache.set('captain', 'leela')
+        cache.set('delivery-boy', 'fry')
+        cache.get('captain')  # captain is now most recently used
+        cache.set('cook', 'bender')
+
+        with pytest.raises(KeyError, match=r"delivery-boy"):
+            cache.get('delivery-boy')
+
+        assert cache.get('captain') == 'leela'
+        assert cache.get('cook') == 'bender'
+        assert not cache.index  # nothing expires, so nothing is indexed
+
+    def test_set_many_eviction(self):
+        cache = simplecache.Cache(maxsize=2)
+        cache.set_many({'captain': 'leela', 'delivery-boy': 'fry', 'cook': 'bender'})
+        assert dict(cache) == {'delivery-boy': 'fry', 'cook': 'bender'}
+
+
+class TestConcurrency:
+    """Test lock-free readers don't break concurrent writers."""
+    def test_unbounded_get_is_lock_free(self):
+        cache = simplecache.Cache()
+        cache.set('pin', 1077)
+        with cache.lock:
+            assert cache.get('pin') == 1077
+
+    def test_lru_get_waits_for_writers(self):
+        cache = simplecache.Cache(maxsize=2)
+        cache.set('pin', 1077)
+        with cache.lock:
+            reader = threading.Thread(target=cache.get, args=('pin',))
+            reader.start()
+            reader.join(timeout=.05)
+            assert reader.is_alive()  # reordering storage waits for the lock
+        reader.join()
+
+    def test_lru_reads_during_writes(self):
+        cache = simplecache.Cache(ttl=60, maxsize=2000)
+        errors = []
+        written = [0]
+        done = threading.Event()
+
+        def write():
+            try:
+                for n in range(50000):
+                    cache.set(n, n)
+                    written[0] = n
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+            finally:
+                done.set()
+
+        def read():
+            try:
+                while not done.is_set():
+                    cache.get(0, None)  # keeps index compaction busy
+                    for n in range(max(0, written[0] - 1500), written[0], 50):
+                        cache.get(n, None)
+                    repr(cache)
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=write)]
+            threads += [threading.Thread(target=read) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        assert not errors
+
 
 class TestSetKeyAgain:
     """Test index doesn't end up with duplicate entries."""
@@ -138,4 +378,109 @@ class TestSetKeyAgain:
         cache.set('pin', 1077)
         cache.set('pin', 1077)
         assert len(cache.storage) == 1
-        assert len(cache.index) == 1
+        assert cache.get('pin') == 1077
+
+    def test_index_compaction(self):
+        cache = simplecache.Cache(ttl=60)
+        cache.set('captain', 'leela')  # keeps stale nodes from reaching the top
+        for i in range(100):
+            cache.set('pin', i)
+        assert len(cache.storage) == 2
+        assert len(cache.index) <= 4
+        assert cache.get('pin') == 99
+
+    def test_unorderable_keys(self):
+        class Key:
+            pass
+
+        keys = [Key() for _ in range(4)]
+        cache = simplecache.Cache(ttl=60)
+        cache.set('captain', 'leela', ttl=120)  # heap mode
+        cache.set_many({keys[0]: 1, keys[1]: 2})
+        cache.set_many({keys[2]: 3, keys[3]: 4}, ttl=30)
+        assert [cache.get(k) for k in keys] == [1, 2, 3, 4]
+
+    def test_unorderable_keys_compaction(self):
+        class Key:
+            pass
+
+        keys = [Key() for _ in range(2)]
+        cache = simplecache.Cache(ttl=60)
+        cache.set('captain', 'leela')  # keeps stale nodes from reaching the top
+        for i in range(10):
+            cache.set_many({keys[0]: i, keys[1]: i, 1: i, 'a': i})
+        assert len(cache.index) <= 2 * len(cache.storage)
+        assert cache.get(keys[1]) == 9
+
+    def test_overwrite_refreshes_ttl(self):
+        cache = simplecache.Cache(ttl=.1)
+        cache.set('pin', 1077)
+        cache.set('pin', 1077, ttl=60)
+        time.sleep(.1)
+        assert cache.get('pin') == 1077
+
+
+class TestSharded:
+    """Test sharded cache dispatches to the right shard."""
+    def test_bad_shards(self):
+        with pytest.raises(ValueError, match=r"shards must be a power of 2"):
+            simplecache.ShardedCache(shards=3)
+
+    def test_bad_maxsize(self):
+        with pytest.raises(ValueError, match=r"maxsize must be greater than 0"):
+            simplecache.ShardedCache(maxsize=-1)
+        with pytest.raises(ValueError, match=r"maxsize must be at least the number of shards"):
+            simplecache.ShardedCache(maxsize=8, shards=16)
+
+    def test_bad_clock_resolution(self):
+        with pytest.raises(ValueError, match=r"clock_resolution must be greater than 0"):
+            simplecache.ShardedCache(clock_resolution=0)
+
+    def test_clock_resolution(self):
+        cache = simplecache.ShardedCache(ttl=.1, shards=4, clock_resolution=.01)
+        assert all(shard._now is not None for shard in cache._shards)
+        cache.set('pin', 1077)
+        assert cache.get('pin') == 1077
+        time.sleep(.2)
+        assert not cache.exists('pin')
+
+    def test_set_get(self):
+        cache = simplecache.ShardedCache(shards=4)
+        cache.set('captain', 'leela')
+        cache.set('delivery-boy', 'fry')
+        cache.set('cook', 'bender')
+
+        assert cache.get('captain') == 'leela'
+        assert cache.get('balance', 0.93) == 0.93
+        assert cache.exists('cook')
+        assert len(cache) == 3
+        assert dict(cache) == {'captain': 'leela', 'delivery-boy': 'fry', 'cook': 'bender'}
+
+        cache.set_many({'pin': 1077})
+        assert cache.get('pin') == 1077
+
+        cache.clear()
+        assert len(cache) == 0
+        assert repr(cache) == '{}'
+
+    def test_expiration(self):
+        cache = simplecache.ShardedCache(ttl=.1, shards=2)
+        cache.set('pin', 1077)
+        time.sleep(.1)
+        cache.prune()
+        assert len(cache) == 0
+
+    def test_maxsize(self):
+        cache = simplecache.ShardedCache(maxsize=10, shards=4)
+        for i in range(100):
+            cache.set(i, i)
+        assert len(cache) <= 10
+
+        cache.set_many((i, i) for i in range(100))
+        assert len(cache) <= 10
+
+    def test_repr(self):
+        cache = simplecache.ShardedCache(shards=1)
+        for k in 'abcd':
+            cache.set(k, k)
+        assert repr(cache) == "{'a': 'a', 'b': 'b', 'c': 'c', ...}"